@@ -53,16 +53,21 @@ touch $ROOT_DIRECTORY/fixtures/recompile/test/module/exporting_test.ts
 (find $ROOT_DIRECTORY/fixtures/recompile/ > /dev/null)
 run_fixture "recompile" 0
 
-# Test that compiling after a change in a dependency rebuilds only relevant libraries
+# Test that a touch-only change in a dependency reruns just that action: with
+# the surviving incremental state, tsc emits nothing for unchanged contents
+# and restat prunes the dependents
 run_fixture "recompile_dep"
 touch $ROOT_DIRECTORY/fixtures/recompile_dep/front_end/module/module.ts
 # We need to force read from this directory to make sure autoninja actually picks up the change
 (find $ROOT_DIRECTORY/fixtures/recompile_dep/ > /dev/null)
 run_fixture "recompile_dep" 0
 
-# Test that ninja clean properly cleans all files
+# Test that ninja clean properly cleans all files. The `.tsbuildinfo` files
+# are intentionally not declared as GN outputs and survive the clean; they
+# only carry the compiler's incremental state and ts_library.py discards them
+# itself when they go stale.
 (cd $ROOT_DIRECTORY/out/fixtures/simple_dep && ninja -t clean)
-files=$(find $ROOT_DIRECTORY/out/fixtures/simple_dep/gen -type f)
+files=$(find $ROOT_DIRECTORY/out/fixtures/simple_dep/gen -type f ! -name "*.tsbuildinfo")
 
 if [[ "$files" != "" ]]; then
   echo "Did not properly clean with \"ninja -t clean\". Unexpected files:"
@@ -70,19 +75,9 @@ if [[ "$files" != "" ]]; then
   failed=1
 fi
 
-# Test that the .tsbuildinfo is deterministic
+# Test that a recompilation after "ninja -t clean" succeeds, even though the
+# surviving .tsbuildinfo claims the (now deleted) outputs are up to date.
 (cd $ROOT_DIRECTORY/out/fixtures/recompile_dep && ninja -t clean)
 run_fixture "recompile_dep"
 
-generated_tsbuildinfo="$ROOT_DIRECTORY/out/fixtures/recompile_dep/gen/test/module/module-tsconfig.json.tsbuildinfo"
-expected_tsbuildinfo="$ROOT_DIRECTORY/fixtures/recompile_dep/expected.tsbuildinfo"
-
-tsbuildinfo_diff_output=$(diff "$generated_tsbuildinfo" "$expected_tsbuildinfo")
-
-if [[ "$tsbuildinfo_diff_output" != "" ]]; then
-  echo ".tsbuildinfo is non-deterministic (crbug.com/1054494)"
-  echo "$tsbuildinfo_diff_output"
-  failed=1
-fi
-
 exit $failed
\ No newline at end of file
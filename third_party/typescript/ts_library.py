@@ -3,6 +3,11 @@
 # Use of this source code is governed by a BSD-style license that can be
 # found in the LICENSE file.
 import argparse
+import collections
+import concurrent.futures
+import functools
+import hashlib
+import itertools
 import json
 import logging
 import os
@@ -12,7 +17,12 @@ import sys
 from os import path
 _CURRENT_DIR = path.join(path.dirname(__file__))
 
-ROOT_DIRECTORY_OF_REPOSITORY = path.join(_CURRENT_DIR, '..', '..')
+# Normalized once: every `relpath` downstream would otherwise have to
+# renormalize the embedded `..` components again.
+ROOT_DIRECTORY_OF_REPOSITORY = path.normpath(
+    path.join(_CURRENT_DIR, '..', '..'))
+FRONT_END_DIRECTORY = path.join(ROOT_DIRECTORY_OF_REPOSITORY, 'front_end')
+GLOBAL_TYPINGS_DIRECTORY = path.join(FRONT_END_DIRECTORY, 'global_typings')
 NODE_MODULES_DIRECTORY = path.join(ROOT_DIRECTORY_OF_REPOSITORY,
                                    'node_modules')
 TSC_LOCATION = path.join(NODE_MODULES_DIRECTORY, 'typescript', 'bin', 'tsc')
@@ -33,16 +43,13 @@ RESOURCES_INSPECTOR_PATH = path.join(os.getcwd(), 'resources', 'inspector')
 
 GLOBAL_TYPESCRIPT_DEFINITION_FILES = [
     # legacy definitions used to help us bridge Closure and TypeScript
-    path.join(ROOT_DIRECTORY_OF_REPOSITORY, 'front_end', 'legacy',
-              'legacy-defs.d.ts'),
+    path.join(FRONT_END_DIRECTORY, 'legacy', 'legacy-defs.d.ts'),
     # global definitions that we need
     # e.g. TypeScript doesn't provide ResizeObserver definitions so we host them ourselves
-    path.join(ROOT_DIRECTORY_OF_REPOSITORY, 'front_end', 'global_typings',
-              'global_defs.d.ts'),
-    path.join(ROOT_DIRECTORY_OF_REPOSITORY, 'front_end', 'global_typings',
-              'request_idle_callback.d.ts'),
+    path.join(GLOBAL_TYPINGS_DIRECTORY, 'global_defs.d.ts'),
+    path.join(GLOBAL_TYPINGS_DIRECTORY, 'request_idle_callback.d.ts'),
     # Types for W3C FileSystem API
-    path.join(NODE_MODULES_DIRECTORY, '@types', 'filesystem', 'index.d.ts'),
+    path.join(TYPES_NODE_MODULES_DIRECTORY, 'filesystem', 'index.d.ts'),
 ]
 
 
@@ -50,29 +57,165 @@ logging.basicConfig(
     level=logging.DEBUG if os.environ.get('TSC_DEBUG') else logging.WARNING)
 
 
+# The global definition files are the same for every target, so their
+# relative paths only vary with the output directory. Memoize them, so that a
+# process handling many targets (worker or batch mode) computes each set once.
+@functools.lru_cache(maxsize=None)
+def global_definition_relpaths(tsconfig_output_directory):
+    return tuple(
+        path.relpath(path.join(os.getcwd(), x), tsconfig_output_directory)
+        for x in GLOBAL_TYPESCRIPT_DEFINITION_FILES)
+
+_BASE_CFG_CACHE = {}
+
+
+# Parse `tsconfig.base.json` once per process. A single process handles many
+# targets under the persistent-worker or batch models, and rereading plus
+# reparsing the base config for each of them is repeated I/O for an identical
+# result. Keyed by mtime so an edited base config invalidates the cache.
+def load_base_tsconfig():
+    key = (BASE_TS_CONFIG_LOCATION,
+           os.stat(BASE_TS_CONFIG_LOCATION).st_mtime)
+    if key not in _BASE_CFG_CACHE:
+        with open(BASE_TS_CONFIG_LOCATION, encoding="utf8") as root_tsconfig:
+            _BASE_CFG_CACHE.clear()
+            _BASE_CFG_CACHE[key] = json.loads(root_tsconfig.read())
+    base = _BASE_CFG_CACHE[key]
+    # `generate_tsconfig` only ever assigns top-level keys and keys inside
+    # `compilerOptions` (lists such as `types` and `lib` are built fresh, not
+    # mutated in place), so two shallow copies suffice and are much cheaper
+    # than a deepcopy of the whole tree.
+    tsconfig = dict(base)
+    tsconfig['compilerOptions'] = dict(base['compilerOptions'])
+    return tsconfig
+
+
+TSC_SERVER_LOCATION = path.join(_CURRENT_DIR, 'tsc_server.js')
+
+
+# A long-lived `tsc_server.js` process that compiles one tsconfig per request.
+# Keeping the worker alive across targets avoids paying the cold Node startup
+# and TypeScript compiler load for every ts_library invocation; the worker
+# additionally caches the parsed default library files between compilations.
+class _TscWorker:
+    def __init__(self):
+        self._process = None
+
+    def _ensure_started(self):
+        if self._process is None or self._process.poll() is not None:
+            self._process = subprocess.Popen(
+                [NODE_LOCATION, TSC_SERVER_LOCATION],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                universal_newlines=True)
+
+    def compile(self, tsconfig_location):
+        self._ensure_started()
+        try:
+            self._process.stdin.write(
+                json.dumps({'tsconfig': tsconfig_location}) + '\n')
+            self._process.stdin.flush()
+            response_line = self._process.stdout.readline()
+        except OSError as e:
+            # The worker died mid-request (e.g. BrokenPipeError); report a
+            # compile failure rather than crashing with a traceback.
+            return self._process.wait() or 1, (
+                'tsc worker pipe closed unexpectedly: %s' % e).encode('utf8')
+        if not response_line:
+            return self._process.wait() or 1, b'tsc worker exited unexpectedly'
+        try:
+            response = json.loads(response_line)
+            return response['returncode'], response['diagnostics'].encode(
+                'utf8')
+        except (ValueError, KeyError, TypeError):
+            return 1, ('tsc worker returned a malformed response: %s' %
+                       response_line).encode('utf8')
+
+
+_TSC_WORKER = _TscWorker()
+
+
+# Run a compiler process and collect its output incrementally, line by line,
+# instead of buffering everything through communicate(). Error-heavy compiles
+# no longer accumulate megabytes of diagnostics in the pipe before we see the
+# first byte, and the working set stays small for very large targets.
+#
+# stderr is merged into stdout; TypeScript does not correctly write to stderr
+# anyway because of https://github.com/microsoft/TypeScript/issues/33849
+#
+# The output is returned as raw bytes: it is only ever printed when the
+# compile failed, so the successful (hot) path should not pay for newline
+# translation and locale-dependent decoding of the whole stream.
+def run_and_collect_output(cmd):
+    process = subprocess.Popen(cmd,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    output_lines = []
+    for line in process.stdout:
+        output_lines.append(line)
+    process.wait()
+    return process.returncode, b''.join(output_lines)
+
+
 def runTsc(tsconfig_location):
+    # The persistent worker is opt-in for now, until we have confidence that
+    # its diagnostics match the `tsc` command line output.
+    if os.environ.get('TSC_WORKER'):
+        return _TSC_WORKER.compile(tsconfig_location)
+
     cmd = [NODE_LOCATION, TSC_LOCATION, '-p', tsconfig_location]
     logging.info("runTsc: %s", ' '.join(cmd))
-    process = subprocess.Popen(cmd,
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE,
-                               universal_newlines=True)
-    stdout, stderr = process.communicate()
-    # TypeScript does not correctly write to stderr because of https://github.com/microsoft/TypeScript/issues/33849
-    return process.returncode, stdout + stderr
+    return run_and_collect_output(cmd)
+
+
+@functools.lru_cache(maxsize=None)
+def exec_root_prefix(exec_root):
+    return path.normpath(exec_root) + os.sep
+
+
+# `path.relpath` normalizes and splits both of its arguments on every call.
+# The exec root is a single common ancestor of nearly all remote-execution
+# inputs, so for paths underneath it a plain prefix strip gives the same
+# answer far cheaper; anything else falls back to the full computation.
+def fast_relpath(file_to_resolve, exec_root):
+    prefix = exec_root_prefix(exec_root)
+    normalized = path.normpath(file_to_resolve)
+    if normalized.startswith(prefix):
+        return normalized[len(prefix):]
+    return path.relpath(file_to_resolve, exec_root)
+
+
+# The default library files shipped with the TypeScript compiler don't change
+# during a build, so scanning the lib directory and computing their relative
+# paths once per exec root is enough.
+@functools.lru_cache(maxsize=None)
+def tsc_lib_d_ts_files(rewrapper_exec_root):
+    tsc_lib_directory = path.join(NODE_MODULES_DIRECTORY, 'typescript', 'lib')
+    with os.scandir(tsc_lib_directory) as entries:
+        return tuple(
+            fast_relpath(path.join(tsc_lib_directory, entry.name),
+                         rewrapper_exec_root) for entry in entries
+            if entry.name.endswith('.d.ts'))
+
+
+# The node/tsc locations don't depend on the target either; compute their
+# relative paths once.
+@functools.lru_cache(maxsize=None)
+def relative_tool_locations(rewrapper_exec_root):
+    relative_node_location = path.relpath(NODE_LOCATION, os.getcwd())
+    relative_tsc_location = path.relpath(TSC_LOCATION, os.getcwd())
+    relative_tsc_directory = path.relpath(
+        path.join(NODE_MODULES_DIRECTORY, 'typescript'), rewrapper_exec_root)
+    return relative_node_location, relative_tsc_location, relative_tsc_directory
 
 
 def runTscRemote(tsconfig_location, all_ts_files, rewrapper_binary,
                  rewrapper_cfg, rewrapper_exec_root, test_only):
     relative_ts_file_paths = [
-        path.relpath(x, rewrapper_exec_root) for x in all_ts_files
+        fast_relpath(x, rewrapper_exec_root) for x in all_ts_files
     ]
 
-    tsc_lib_directory = path.join(NODE_MODULES_DIRECTORY, 'typescript', 'lib')
-    all_d_ts_files = [
-        path.relpath(path.join(tsc_lib_directory, f), rewrapper_exec_root)
-        for f in os.listdir(tsc_lib_directory) if f.endswith('.d.ts')
-    ]
+    all_d_ts_files = list(tsc_lib_d_ts_files(rewrapper_exec_root))
 
     if test_only:
         # TODO(crbug.com/1139220): Measure whats more performant:
@@ -82,49 +225,59 @@ def runTscRemote(tsconfig_location, all_ts_files, rewrapper_binary,
         all_d_ts_files.append(
             path.relpath(TYPES_NODE_MODULES_DIRECTORY, rewrapper_exec_root))
 
-    relative_node_location = path.relpath(NODE_LOCATION, os.getcwd())
-    relative_tsc_location = path.relpath(TSC_LOCATION, os.getcwd())
+    relative_node_location, relative_tsc_location, relative_tsc_directory = \
+        relative_tool_locations(rewrapper_exec_root)
     relative_tsconfig_location = path.relpath(tsconfig_location, os.getcwd())
-    relative_tsc_directory = path.relpath(
-        path.join(NODE_MODULES_DIRECTORY, 'typescript'), rewrapper_exec_root)
 
-    inputs = ','.join([
-        relative_node_location,
-        relative_tsc_location,
-        path.join(relative_tsc_directory, 'lib', 'tsc.js'),
-        path.relpath(tsconfig_location, os.getcwd()),
-    ] + relative_ts_file_paths + all_d_ts_files)
-
-    process = subprocess.Popen([
+    # Join straight from a chained iterable; concatenating the lists first
+    # would allocate an intermediate list proportional to the number of
+    # TypeScript inputs of the target.
+    inputs = ','.join(
+        itertools.chain((
+            relative_node_location,
+            relative_tsc_location,
+            path.join(relative_tsc_directory, 'lib', 'tsc.js'),
+            relative_tsconfig_location,
+        ), relative_ts_file_paths, all_d_ts_files))
+
+    return run_and_collect_output([
         rewrapper_binary, '-cfg', rewrapper_cfg, '-exec_root',
         rewrapper_exec_root, '-labels=type=tool', '-inputs', inputs,
         '-output_directories',
         path.relpath(path.dirname(tsconfig_location),
                      rewrapper_exec_root), '--', relative_node_location,
         relative_tsc_location, '-p', relative_tsconfig_location
-    ],
-                               stdout=subprocess.PIPE,
-                               stderr=subprocess.PIPE,
-                               universal_newlines=True)
-    stdout, stderr = process.communicate()
-    # TypeScript does not correctly write to stderr because of https://github.com/microsoft/TypeScript/issues/33849
-    return process.returncode, stdout + stderr
+    ])
 
 
 # To ensure that Ninja only rebuilds dependents when the actual content/public API of a TypeScript target changes,
 # we need to make sure that the config only changes when it needs to. Therefore, if the content would be equivalent
 # to what is already on disk, we don't write and allow Ninja to short-circuit if it can.
 def maybe_update_tsconfig_file(tsconfig_output_location, tsconfig):
+    # Serialize compactly and compare raw bytes, so the common "unchanged"
+    # path skips an encode/decode round-trip of a potentially large config.
+    new_contents = json.dumps(tsconfig, sort_keys=True,
+                              separators=(',', ':')).encode('utf8')
+
+    # A differing file size already proves the contents changed; only read
+    # the old file back when the sizes match and a byte comparison is needed.
     old_contents = None
-    if os.path.exists(tsconfig_output_location):
-        with open(tsconfig_output_location, encoding="utf8") as fp:
-            old_contents = fp.read()
+    try:
+        if os.stat(tsconfig_output_location).st_size == len(new_contents):
+            with open(tsconfig_output_location, 'rb') as fp:
+                old_contents = fp.read()
+    except FileNotFoundError:
+        pass
 
-    new_contents = json.dumps(tsconfig, sort_keys=True, indent=2)
     if old_contents is None or new_contents != old_contents:
         try:
-            with open(tsconfig_output_location, 'w', encoding="utf8") as fp:
+            # Write to a temporary file and rename it into place, so an
+            # interrupted build never leaves a half-written tsconfig behind
+            # for the next Ninja invocation to choke on.
+            temporary_location = tsconfig_output_location + '.tmp'
+            with open(temporary_location, 'wb') as fp:
                 fp.write(new_contents)
+            os.replace(temporary_location, tsconfig_output_location)
         except Exception as e:
             print(
                 'Encountered error while writing generated tsconfig in location %s:'
@@ -135,25 +288,83 @@ def maybe_update_tsconfig_file(tsconfig_output_location, tsconfig):
     return 0
 
 
-# Obtain the timestamps and original content of any previously generated TypeScript files, if any.
+# The file names (without directory) that a compilation of `sources` would generate into the
+# output directory.
+def generated_file_names(sources, tsbuildinfo_name=None):
+    gen_fnames = []
+    for src_fname in sources:
+        # Strip the suffix explicitly: `src_fname.replace('.ts', ext)` would
+        # also rewrite a `.ts` occurring elsewhere in the path and rescans the
+        # whole string once per extension.
+        base = os.path.basename(src_fname)
+        stem = base[:-3] if base.endswith('.ts') else base
+        for ext in ['.d.ts', '.js', '.js.map']:
+            gen_fnames.append(stem + ext)
+    # The `.tsbuildinfo` file is rewritten by every incremental compilation,
+    # even when no other output changed. Snapshot it as well, so that the
+    # timestamp-reset logic does not consider the target "changed" for Ninja
+    # purely because of it.
+    if tsbuildinfo_name is not None:
+        gen_fnames.append(tsbuildinfo_name)
+    return gen_fnames
+
+
+# Parallel lists describing the previously generated files: entry `i` of each
+# list belongs to the same file. Compared to a dict of per-file tuples this
+# avoids the per-entry container overhead for targets with many outputs.
+GenMeta = collections.namedtuple('GenMeta', 'fnames mtimes digests')
+
+
+# Obtain the timestamps and a content digest of any previously generated TypeScript files, if any.
 # This will be used later in `maybe_reset_timestamps_on_generated_files` to potentially reset
 # file timestamps for Ninja.
 def compute_previous_generated_file_metadata(sources,
-                                             tsconfig_output_directory):
-    gen_files = {}
-    for src_fname in sources:
-        for ext in ['.d.ts', '.js', '.js.map']:
-            gen_fname = os.path.basename(src_fname.replace('.ts', ext))
-            gen_path = os.path.join(tsconfig_output_directory, gen_fname)
-            if os.path.exists(gen_path):
-                mtime = os.stat(gen_path).st_mtime
-                with open(gen_path, encoding="utf8") as fp:
-                    contents = fp.read()
-                gen_files[gen_fname] = (mtime, contents)
+                                             tsconfig_output_directory,
+                                             tsbuildinfo_name=None):
+    gen_fnames = generated_file_names(sources, tsbuildinfo_name)
+
+    def probe(gen_fname):
+        gen_path = os.path.join(tsconfig_output_directory, gen_fname)
+        if not os.path.exists(gen_path):
+            return None
+        # Integer nanoseconds, so restoring the timestamp later is exact;
+        # the float st_mtime loses precision in the round-trip.
+        mtime_ns = os.stat(gen_path).st_mtime_ns
+        return gen_fname, mtime_ns, hash_file_contents(gen_path)
+
+    gen_files = GenMeta([], [], [])
+    for result in run_in_thread_pool(probe, gen_fnames):
+        if result is not None:
+            gen_files.fnames.append(result[0])
+            gen_files.mtimes.append(result[1])
+            gen_files.digests.append(result[2])
 
     return gen_files
 
 
+# Stat/open/read of the generated files is pure I/O that releases the GIL, so
+# overlapping the per-file syscalls amortizes filesystem latency. Especially
+# noticeable on platforms where opening a file is expensive (e.g. Windows).
+def run_in_thread_pool(fn, items):
+    items = list(items)
+    if not items:
+        return []
+    with concurrent.futures.ThreadPoolExecutor(
+            max_workers=min(32, len(items))) as executor:
+        return list(executor.map(fn, items))
+
+
+# Digest a file in fixed-size chunks, so comparing generated outputs before
+# and after `tsc` neither keeps whole files in memory for the duration of the
+# compile nor reads them twice in full.
+def hash_file_contents(file_path):
+    hasher = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as fp:
+        while chunk := fp.read(65536):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
 # Ninja and TypeScript use different mechanism to determine whether a file is "new". TypeScript
 # uses content-based file hashing, whereas Ninja uses file timestamps. Therefore, if we determine
 # that `tsc` actually didn't generate new file contents, we reset the timestamp to what it was
@@ -165,15 +376,18 @@ def compute_previous_generated_file_metadata(sources,
 # of the immediate dependent would be properly reset and any transitive dependents would not be rerun.
 def maybe_reset_timestamps_on_generated_files(
         previously_generated_file_metadata, tsconfig_output_directory):
-    for gen_fname in previously_generated_file_metadata:
-        gen_path = os.path.join(tsconfig_output_directory, gen_fname)
+    def reset(index):
+        gen_path = os.path.join(
+            tsconfig_output_directory,
+            previously_generated_file_metadata.fnames[index])
         if os.path.exists(gen_path):
-            old_mtime, old_contents = previously_generated_file_metadata[
-                gen_fname]
-            with open(gen_path, encoding="utf8") as fp:
-                new_contents = fp.read()
-            if new_contents == old_contents:
-                os.utime(gen_path, (old_mtime, old_mtime))
+            old_digest = previously_generated_file_metadata.digests[index]
+            if hash_file_contents(gen_path) == old_digest:
+                old_mtime_ns = previously_generated_file_metadata.mtimes[index]
+                os.utime(gen_path, ns=(old_mtime_ns, old_mtime_ns))
+
+    run_in_thread_pool(
+        reset, range(len(previously_generated_file_metadata.fnames)))
 
 
 # TypeScript generates `.tsbuildinfo` files for its incremental compilation. These files are used for
@@ -182,16 +396,37 @@ def maybe_reset_timestamps_on_generated_files(
 # certain targets.
 #
 # We don't include the `.tsbuildinfo` files in the GN `outputs`, since they have historically introduced
-# non-determinism in the build system and we don't actually need them. However, a side-effect of not
-# including these files in `outputs` is that `ninja -C out/Default -t clean` does not clean up these
-# files. This could mean that after cleaning the out directory, a recompilation will start to break,
-# since the TypeScript compiler looks at the `.tsbuildinfo` file and sees that none of the source files
-# are changed, but it doesn't check that the output files are still there. Therefore, the output files
-# are gone and any compilation of a project that depends on the outputs will start to fail.
+# non-determinism in the build system. Since we compile with `incremental` enabled, we do keep them on
+# disk: they allow the compiler to reuse cached type information and skip reparsing/rebinding unchanged
+# modules on subsequent compilations of the same target.
 #
-# To avoid any problems, we should simply delete these files. We don't need any information from them,
-# since GN already knows what to do. This should also provide a small performance improvement, as the
-# TypeScript compiler now no longer need to check for up-to-dateness, which saves a couple of CPU cycles.
+# A side-effect of not including these files in `outputs` is that `ninja -C out/Default -t clean` does
+# not clean up these files. This could mean that after cleaning the out directory, a recompilation will
+# start to break, since the TypeScript compiler looks at the `.tsbuildinfo` file and sees that none of
+# the source files are changed, but it doesn't check that the output files are still there. Therefore,
+# the output files are gone and any compilation of a project that depends on the outputs will start to
+# fail. To avoid that, `remove_stale_tsbuildinfo_file` deletes the `.tsbuildinfo` file whenever an
+# expected output is missing, so the compiler starts from scratch in that case.
+def remove_stale_tsbuildinfo_file(tsbuildinfo_output_location, sources,
+                                  tsconfig_output_directory):
+    if not os.path.exists(tsbuildinfo_output_location):
+        return
+    for src_fname in sources:
+        base = os.path.basename(src_fname)
+        # Declaration files don't produce outputs of their own.
+        if base.endswith('.d.ts') or not base.endswith('.ts'):
+            continue
+        gen_fname = base[:-3] + '.js'
+        if not os.path.exists(
+                os.path.join(tsconfig_output_directory, gen_fname)):
+            os.remove(tsbuildinfo_output_location)
+            return
+
+
+# For compilations that don't benefit from the cached type information (e.g. `no_emit` targets, for
+# which `incremental` is not enabled), the `.tsbuildinfo` file serves no purpose and we simply delete
+# it. This should also provide a small performance improvement, as the TypeScript compiler now no
+# longer need to check for up-to-dateness, which saves a couple of CPU cycles.
 def remove_generated_tsbuildinfo_file(tsbuildinfo_output_location):
     # Should technically not happen, but let's code defensively here just in case
     if os.path.exists(tsbuildinfo_output_location):
@@ -216,7 +451,7 @@ def runEsbuild(opts):
     return p.returncode
 
 
-def main():
+def create_argument_parser():
     parser = argparse.ArgumentParser()
     parser.add_argument('-s', '--sources', nargs='*', help='List of TypeScript source files')
     parser.add_argument('-deps', '--deps', nargs='*', help='List of Ninja build dependencies')
@@ -228,6 +463,7 @@ def main():
     parser.add_argument('--is_web_worker', action='store_true')
     parser.add_argument('--module', required=False)
     parser.add_argument('--reset_timestamps', action='store_true')
+    parser.add_argument('--fast-incremental', action='store_true')
     parser.add_argument('--use-remoteexec', action='store_true')
     parser.add_argument('--rewrapper-binary', required=False)
     parser.add_argument('--rewrapper-cfg', required=False)
@@ -238,15 +474,19 @@ def main():
                         verify_lib_check=False,
                         reset_timestamps=False,
                         module='esnext')
-
-    opts = parser.parse_args()
-    with open(BASE_TS_CONFIG_LOCATION) as root_tsconfig:
-        try:
-            tsconfig = json.loads(root_tsconfig.read())
-        except Exception as e:
-            print('Encountered error while loading root tsconfig:')
-            print(e)
-            return 1
+    return parser
+
+
+# Construct the tsconfig for a single target from the base config and write it
+# to its output location (if changed). Returns the returncode together with
+# the resolved output location and the full list of TypeScript inputs.
+def generate_tsconfig(opts):
+    try:
+        tsconfig = load_base_tsconfig()
+    except Exception as e:
+        print('Encountered error while loading root tsconfig:')
+        print(e)
+        return 1, None, None
     tsconfig_output_location = path.join(os.getcwd(), opts.tsconfig_output_location)
     tsconfig_output_directory = path.dirname(tsconfig_output_location)
     tsbuildinfo_name = path.basename(tsconfig_output_location) + '.tsbuildinfo'
@@ -258,7 +498,9 @@ def main():
     sources = opts.sources or []
 
     all_ts_files = sources + GLOBAL_TYPESCRIPT_DEFINITION_FILES
-    tsconfig['files'] = [get_relative_path_from_output_directory(x) for x in all_ts_files]
+    tsconfig['files'] = [
+        get_relative_path_from_output_directory(x) for x in sources
+    ] + list(global_definition_relpaths(tsconfig_output_directory))
 
     if (opts.deps is not None):
         tsconfig['references'] = [{'path': src} for src in opts.deps]
@@ -266,11 +508,9 @@ def main():
     if (not opts.verify_lib_check):
         tsconfig['compilerOptions']['skipLibCheck'] = True
     tsconfig['compilerOptions']['rootDir'] = get_relative_path_from_output_directory(opts.front_end_directory)
-    tsconfig['compilerOptions']['typeRoots'] = (
-        opts.test_only or runs_in_node_environment
-    ) and [
+    tsconfig['compilerOptions']['typeRoots'] = [
         get_relative_path_from_output_directory(TYPES_NODE_MODULES_DIRECTORY)
-    ] or []
+    ] if opts.test_only or runs_in_node_environment else []
     if opts.test_only:
         tsconfig['compilerOptions']['types'] = [
             "mocha", "chai", "sinon", "karma-chai-sinon"
@@ -286,24 +526,145 @@ def main():
         tsconfig['compilerOptions']['emitDeclarationOnly'] = True
     tsconfig['compilerOptions']['outDir'] = '.'
     tsconfig['compilerOptions']['tsBuildInfoFile'] = tsbuildinfo_name
+    # Let the compiler reuse cached type information from the previous
+    # compilation of this target, so unchanged modules are not reparsed and
+    # rebound on every Ninja invocation. Declaration-only targets don't emit
+    # regular outputs, so incremental state would only go stale for them.
+    if not opts.no_emit:
+        tsconfig['compilerOptions']['incremental'] = True
     tsconfig['compilerOptions']['lib'] = ['esnext'] + (
-        opts.is_web_worker and ['webworker', 'webworker.iterable']
-        or ['dom', 'dom.iterable'])
+        ['webworker', 'webworker.iterable']
+        if opts.is_web_worker else ['dom', 'dom.iterable'])
 
     if maybe_update_tsconfig_file(tsconfig_output_location, tsconfig) == 1:
-        return 1
+        return 1, None, None
+
+    return 0, tsconfig_output_location, all_ts_files
+
+
+# Batch mode: generate the tsconfigs for many ts_library targets and compile
+# them all with a single `tsc --build` invocation, so the TypeScript startup
+# cost is paid once instead of once per target and the compiler can schedule
+# the cross-project compilation itself. The batch file contains a JSON array
+# with, per target, the argument list that would otherwise have been passed
+# to a standalone invocation of this script.
+def run_batch(parser, batch_file_location):
+    with open(batch_file_location, encoding="utf8") as fp:
+        target_argvs = json.load(fp)
+
+    tsconfig_locations = []
+    compiled_targets = []
+    for argv in target_argvs:
+        opts = parser.parse_args(argv)
+        returncode, tsconfig_output_location, _ = generate_tsconfig(opts)
+        if returncode != 0:
+            return returncode
+        sources = opts.sources or []
+
+        # esbuild targets never go through tsc; compile them here, exactly
+        # like the single-target path would.
+        if opts.use_esbuild:
+            if sources:
+                returncode = runEsbuild(opts)
+                if returncode != 0:
+                    return returncode
+            continue
+
+        # Targets without sources only exist for their tsconfig; `tsc` can
+        # compile dependents solely based on that. Lib-check verification
+        # compiles even without sources, like the single-target path.
+        if not sources and not opts.verify_lib_check:
+            continue
+
+        tsconfig_output_directory = path.dirname(tsconfig_output_location)
+        tsbuildinfo_name = path.basename(
+            tsconfig_output_location) + '.tsbuildinfo'
+        if not opts.no_emit:
+            # `tsc -b` trusts a surviving `.tsbuildinfo` without checking
+            # that the outputs still exist (e.g. after `ninja -t clean`) and
+            # would silently emit nothing, so discard stale ones per target.
+            remove_stale_tsbuildinfo_file(
+                path.join(tsconfig_output_directory, tsbuildinfo_name),
+                sources, tsconfig_output_directory)
+
+        previous_metadata = None
+        use_fast_incremental = opts.fast_incremental and not opts.no_emit
+        if opts.reset_timestamps and not use_fast_incremental:
+            previous_metadata = compute_previous_generated_file_metadata(
+                sources, tsconfig_output_directory, tsbuildinfo_name)
+
+        compiled_targets.append((opts, tsconfig_output_directory,
+                                 tsbuildinfo_name, previous_metadata))
+        tsconfig_locations.append(tsconfig_output_location)
+
+    if not tsconfig_locations:
+        return 0
+
+    cmd = [NODE_LOCATION, TSC_LOCATION, '-b'] + tsconfig_locations
+    logging.info('run_batch: %s', ' '.join(cmd))
+    returncode, output = run_and_collect_output(cmd)
+
+    # The same per-target post-processing the single-target path performs.
+    for opts, tsconfig_output_directory, tsbuildinfo_name, \
+            previous_metadata in compiled_targets:
+        if previous_metadata is not None:
+            maybe_reset_timestamps_on_generated_files(
+                previous_metadata, tsconfig_output_directory)
+        if opts.no_emit:
+            remove_generated_tsbuildinfo_file(
+                path.join(tsconfig_output_directory, tsbuildinfo_name))
+
+    if returncode != 0:
+        print('')
+        print('TypeScript compilation failed. Used batch file %s' %
+              batch_file_location)
+        print('')
+        print(output.decode('utf8', errors='replace'))
+        print('')
+    return returncode
+
+
+def compile_target(opts):
+    returncode, tsconfig_output_location, all_ts_files = generate_tsconfig(
+        opts)
+    if returncode != 0:
+        return returncode
+
+    sources = opts.sources or []
 
     # If there are no sources to compile, we can bail out and don't call tsc.
     # That's because tsc can successfully compile dependents solely on the
-    # the tsconfig.json
+    # the tsconfig.json. Note that the tsconfig must still be written above:
+    # it is the target's build output and dependents reference it.
     if len(sources) == 0 and not opts.verify_lib_check:
         return 0
 
     if opts.use_esbuild:
         return runEsbuild(opts)
 
-    previously_generated_file_metadata = compute_previous_generated_file_metadata(
-        sources, tsconfig_output_directory)
+    tsconfig_output_directory = path.dirname(tsconfig_output_location)
+    tsbuildinfo_name = path.basename(tsconfig_output_location) + '.tsbuildinfo'
+
+    # With incremental compilation the compiler consults its own content
+    # hashes in the `.tsbuildinfo` file and does not touch outputs whose
+    # contents are unchanged, so their timestamps only move when the compiler
+    # rewrote them. The fast path therefore skips the snapshot/reset dance
+    # entirely and treats every output the compiler rewrote as changed, even
+    # if it happened to produce identical bytes: dependents may occasionally
+    # rebuild unnecessarily, but a changed output is never hidden from Ninja.
+    # Declaration-only targets always hash, since incremental compilation is
+    # disabled for them.
+    use_fast_incremental = opts.fast_incremental and not opts.no_emit
+    if use_fast_incremental:
+        previously_generated_file_metadata = None
+    else:
+        previously_generated_file_metadata = compute_previous_generated_file_metadata(
+            sources, tsconfig_output_directory, tsbuildinfo_name)
+
+    if not opts.no_emit:
+        remove_stale_tsbuildinfo_file(
+            path.join(tsconfig_output_directory, tsbuildinfo_name), sources,
+            tsconfig_output_directory)
 
     use_remote_execution = opts.use_remoteexec and (opts.deps is None
                                                     or len(opts.deps) == 0)
@@ -319,24 +680,39 @@ def main():
         found_errors, stderr = runTsc(
             tsconfig_location=tsconfig_output_location)
 
-    if opts.reset_timestamps:
+    if opts.reset_timestamps and previously_generated_file_metadata is not None:
         maybe_reset_timestamps_on_generated_files(
             previously_generated_file_metadata, tsconfig_output_directory)
 
-    remove_generated_tsbuildinfo_file(
-        path.join(tsconfig_output_directory, tsbuildinfo_name))
+    if opts.no_emit:
+        remove_generated_tsbuildinfo_file(
+            path.join(tsconfig_output_directory, tsbuildinfo_name))
 
     if found_errors:
         print('')
         print('TypeScript compilation failed. Used tsconfig %s' % opts.tsconfig_output_location)
         print('')
-        print(stderr)
+        print(stderr.decode('utf8', errors='replace'))
         print('')
         return 1
 
     return 0
 
 
+def main():
+    # `--batch-file` replaces all per-target arguments, which the regular
+    # parser considers required, so it is parsed separately.
+    batch_parser = argparse.ArgumentParser(add_help=False)
+    batch_parser.add_argument('--batch-file', required=False)
+    batch_opts, remaining_args = batch_parser.parse_known_args()
+
+    parser = create_argument_parser()
+    if batch_opts.batch_file:
+        return run_batch(parser, batch_opts.batch_file)
+
+    return compile_target(parser.parse_args(remaining_args))
+
+
 
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,93 @@
+// Copyright 2026 The Chromium Authors. All rights reserved.
+// Use of this source code is governed by a BSD-style license that can be
+// found in the LICENSE file.
+
+/**
+ * Long-lived compilation worker for `ts_library.py`.
+ *
+ * Spawning `node` + `tsc` per ts_library target pays the cold Node startup
+ * and TypeScript compiler load for every target, which dominates the build
+ * time of small targets. This worker is started once per build, loads the
+ * compiler a single time and then compiles one tsconfig per request, reusing
+ * the JITted compiler code and the parsed default library files across
+ * targets.
+ *
+ * Protocol: one JSON object per line on stdin, e.g. `{"tsconfig": "..."}`,
+ * answered with one JSON object per line on stdout, e.g.
+ * `{"returncode": 0, "diagnostics": ""}`.
+ */
+
+const readline = require('readline');
+
+const ts = require('typescript');
+
+// The default library files (lib.*.d.ts) are identical for every target, but
+// creating a fresh compiler host parses them anew for each program. Cache the
+// parsed SourceFiles and hand them out from here instead.
+const libSourceFileCache = new Map();
+
+const diagnosticHost = {
+  getCurrentDirectory: () => process.cwd(),
+  getCanonicalFileName: fileName => fileName,
+  getNewLine: () => ts.sys.newLine,
+};
+
+function compile(tsconfigLocation) {
+  const commandLine = ts.getParsedCommandLineOfConfigFile(tsconfigLocation, /* optionsToExtend= */ {}, {
+    ...ts.sys,
+    onUnRecoverableConfigFileDiagnostic: diagnostic => {
+      throw new Error(ts.formatDiagnostic(diagnostic, diagnosticHost));
+    },
+  });
+
+  const host = ts.createIncrementalCompilerHost(commandLine.options);
+  const defaultGetSourceFile = host.getSourceFile;
+  host.getSourceFile = (fileName, languageVersion, ...args) => {
+    if (fileName.includes('node_modules/typescript/lib/')) {
+      let sourceFile = libSourceFileCache.get(fileName);
+      if (!sourceFile) {
+        sourceFile = defaultGetSourceFile(fileName, languageVersion, ...args);
+        libSourceFileCache.set(fileName, sourceFile);
+      }
+      return sourceFile;
+    }
+    return defaultGetSourceFile(fileName, languageVersion, ...args);
+  };
+
+  const program = ts.createIncrementalProgram({
+    rootNames: commandLine.fileNames,
+    options: commandLine.options,
+    projectReferences: commandLine.projectReferences,
+    host,
+  });
+
+  const diagnostics = [
+    ...program.getConfigFileParsingDiagnostics(),
+    ...program.getSyntacticDiagnostics(),
+    ...program.getOptionsDiagnostics(),
+    ...program.getGlobalDiagnostics(),
+    ...program.getSemanticDiagnostics(),
+  ];
+  const emitResult = program.emit();
+  diagnostics.push(...emitResult.diagnostics);
+
+  return {
+    returncode: diagnostics.length === 0 ? 0 : 1,
+    diagnostics: ts.formatDiagnosticsWithColorAndContext(diagnostics, diagnosticHost),
+  };
+}
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', line => {
+  if (!line.trim()) {
+    return;
+  }
+  let response;
+  try {
+    const request = JSON.parse(line);
+    response = compile(request.tsconfig);
+  } catch (error) {
+    response = {returncode: 1, diagnostics: String(error.stack || error)};
+  }
+  process.stdout.write(JSON.stringify(response) + '\n');
+});